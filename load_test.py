@@ -0,0 +1,505 @@
+"""
+Load test harness for the raceEngineer Dash callbacks.
+
+Simulates N browser clients hitting the Dash '_dash-update-component' endpoint with the same payloads a browser sends
+when opening the dashboard, selecting a race, filtering drivers and auto refreshing. The OpenF1 data source is replaced
+by a local stub server serving seeded synthetic sessions, so that the results are reproducible and do not depend on
+(or stress) the real API.
+
+Usage:
+    python load_test.py --clients 1,2,4,8,16 --iterations 5
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import median
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from src.utils import available_years, current_year
+
+stub_years = 3  # number of years of synthetic sessions, the most recent ones selectable in the app
+
+team_colours = ['3671C6', 'E8002D', '27F4D2', 'FF8000', '229971', 'FF87BC', '64C4FF', 'B6BABD', '52E252', '6692FF']
+
+
+def iso_date(date):
+    """
+    Formats a date like the OpenF1 API does, always including microseconds so that dates compare as strings
+    :param date: datetime
+    :return: iso formatted date
+    """
+    return date.isoformat(timespec='microseconds')
+
+
+class OpenF1Stub:
+    """
+    Deterministic synthetic data source answering the subset of the OpenF1 API used by RaceData
+    """
+
+    def __init__(self, years, races_per_year=24, laps=57, drivers=20, interval_step=4.0, seed=0, reference=None,
+                 live_sessions=0):
+        """
+        :param years: years of the sessions
+        :param races_per_year: number of sessions per year
+        :param laps: number of laps of the sessions
+        :param drivers: number of drivers of the sessions
+        :param interval_step: seconds between two intervals of a driver
+        :param seed: seed of the generated data
+        :param reference: date (datetime) the sessions are dated from, by default the current date. Sessions are over
+        (ended days before the reference) except for the latest live_sessions, which are live at the reference date.
+        Whether sessions are live or over thus does not depend on the day the test is run.
+        :param live_sessions: number of the latest sessions which are live at the reference date
+        """
+        self.__laps = laps
+        self.__drivers = drivers
+        self.__interval_step = interval_step
+        self.__seed = seed
+        self.__sessions = {}  # session_key: session item
+        self.__data = {}  # (endpoint, session_key): list of items, generated on first request
+        self.__responses = {}  # (endpoint, session_key): serialized response
+        self.__lock = threading.Lock()
+        reference = (reference or datetime.now(timezone.utc)).replace(microsecond=0)
+        # Session keys only depend on the position of the session (oldest first), not on the actual years
+        calendar = [(year, race) for year in sorted(years) for race in range(races_per_year)]
+        for index, (year, race) in enumerate(calendar):
+            session_key = 10000 + index
+            if index >= len(calendar) - live_sessions:
+                date_start = reference - timedelta(minutes=30)  # live: started 30 minutes before the reference
+            else:
+                date_start = reference - timedelta(days=7 * (len(calendar) - live_sessions - index))
+            self.__sessions[session_key] = {
+                'session_key': session_key,
+                'meeting_key': session_key,
+                'session_name': 'Race',
+                'session_type': 'Race',
+                'country_name': f'Country {race + 1}',
+                'location': f'Circuit {race + 1}',
+                'year': year,
+                'date_start': iso_date(date_start),
+                'date_end': iso_date(date_start + timedelta(hours=2))}
+
+    def sessions(self):
+        """
+        :return: list of the session items, oldest first
+        """
+        return list(self.__sessions.values())
+
+    def get(self, endpoint, params):
+        """
+        Returns the serialized response of a request
+        :param endpoint: name of the API endpoint (sessions, drivers, laps, position, intervals)
+        :param params: dict with the query parameters
+        :return: json encoded response
+        """
+        if endpoint == 'sessions':
+            if 'session_key' in params:
+                session = self.__session(params['session_key'])
+                return json.dumps([session] if session else [])
+            year = int(params.get('year', current_year()))
+            return json.dumps([s for s in self.__sessions.values() if s['year'] == year])
+        session = self.__session(params.get('session_key'))
+        if not session:
+            return '[]'
+        key = (endpoint, session['session_key'])
+        with self.__lock:
+            if key not in self.__data:
+                for generated_key, items in self.__generate(session).items():
+                    self.__data[generated_key] = items
+                    self.__responses[generated_key] = json.dumps(items)
+        if 'date>' in params:
+            # Query parameter 'date>=value', dates are all generated in the same iso format and compare as strings
+            return json.dumps([item for item in self.__data.get(key, []) if item['date'] >= params['date>']])
+        return self.__responses.get(key, '[]')
+
+    def __session(self, session_key):
+        if session_key == 'latest':
+            return self.__sessions[max(self.__sessions)]
+        if session_key is None or not session_key.isnumeric():
+            return None
+        return self.__sessions.get(int(session_key))
+
+    def __generate(self, session):
+        """
+        Generates drivers, laps, positions and intervals of a session, seeded by the session key
+        :param session: session item
+        :return: dict with (endpoint, session_key): list of items
+        """
+        rng = random.Random(self.__seed * 1_000_003 + session['session_key'])
+        session_key = session['session_key']
+        date_start = datetime.fromisoformat(session['date_start'])
+        numbers = rng.sample(range(1, 100), self.__drivers)
+        pace = {number: rng.uniform(88.0, 91.0) for number in numbers}
+        drivers, laps, positions, intervals = [], [], [], []
+        for i, number in enumerate(numbers):
+            drivers.append({'session_key': session_key,
+                            'driver_number': number,
+                            'country_code': 'XXX',
+                            'first_name': f'Driver{number}',
+                            'last_name': f'Lastname{number}',
+                            'headshot_url': None,
+                            'team_colour': team_colours[i // 2 % len(team_colours)],
+                            'team_name': f'Team {i // 2 + 1}',
+                            'name_acronym': f'D{number:02d}'})
+        elapsed = {number: i * 0.2 for i, number in enumerate(numbers)}  # grid start offsets
+        for lap in range(1, self.__laps + 1):
+            lap_start = dict(elapsed)
+            for number in numbers:
+                elapsed[number] += pace[number] + rng.gauss(0.0, 0.6) + (8.0 if lap == 1 else 0.0)
+                laps.append({'session_key': session_key,
+                             'driver_number': number,
+                             'lap_number': lap,
+                             'date_start': iso_date(date_start + timedelta(seconds=lap_start[number])),
+                             'lap_duration': None if lap == 1 else round(elapsed[number] - lap_start[number], 3)})
+            order = sorted(numbers, key=lambda n: elapsed[n])
+            lap_end = date_start + timedelta(seconds=elapsed[order[0]])
+            for position, number in enumerate(order, 1):
+                positions.append({'session_key': session_key,
+                                  'driver_number': number,
+                                  'date': iso_date(lap_end),
+                                  'position': position})
+            # Intervals are published every few seconds: interpolate the gaps along the lap
+            lap_time = elapsed[order[0]] - lap_start[order[0]]
+            for step in range(int(lap_time // self.__interval_step)):
+                fraction = step * self.__interval_step / lap_time
+                date = iso_date(date_start + timedelta(seconds=lap_start[order[0]] + fraction * lap_time))
+                previous = None
+                for number in order:
+                    gap = lap_start[number] + fraction * (elapsed[number] - lap_start[number])
+                    leader = lap_start[order[0]] + fraction * lap_time
+                    intervals.append({'session_key': session_key,
+                                      'driver_number': number,
+                                      'date': date,
+                                      'gap_to_leader': round(gap - leader, 3),
+                                      'interval': round(gap - previous, 3) if previous is not None else 0.0})
+                    previous = gap
+        return {('drivers', session_key): drivers,
+                ('laps', session_key): laps,
+                ('position', session_key): positions,
+                ('intervals', session_key): intervals}
+
+
+def run_stub_server(stub_args, port_queue):
+    """
+    Serves the stub data source over HTTP, meant to run in its own process.
+    The stub is built in the process from its arguments: the stub itself cannot be pickled (it holds a lock), which is
+    required to start a process with the 'spawn' start method (default on Windows and macOS).
+    :param stub_args: dict with the arguments of OpenF1Stub
+    :param port_queue: queue where the port of the server is published once listening
+    """
+    stub = OpenF1Stub(**stub_args)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            body = stub.get(url.path.strip('/').split('/')[-1], params).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class DashClient:
+    """
+    Simulated browser: keeps the state of the page and sends the callback requests the browser would send
+    """
+
+    def __init__(self, post, callback_map, initial_state, year, race_id, filtered_drivers=5):
+        self.__post = post
+        self.__outputs = {}  # callback name: output string used as key by Dash
+        for output in callback_map:
+            for name in ('race-select.options', 'drivers-data-store.data', 'race-trace-graph.figure',
+                         'live-gaps-graph.figure', 'positions-graph.figure'):
+                if name in output:
+                    self.__outputs[name] = output
+        self.__state = dict(initial_state)  # 'id.property': value
+        self.__state['year-select.value'] = year
+        self.__state['race-select.value'] = str(race_id)
+        self.__filtered_drivers = filtered_drivers  # number of drivers kept when filtering
+        self.__filtering = False
+        self.latencies = defaultdict(list)  # callback name: list of latencies (seconds)
+        self.errors = 0
+
+    def __prop(self, component_id, prop):
+        return {'id': component_id, 'property': prop, 'value': self.__state.get(f'{component_id}.{prop}')}
+
+    def __call(self, name, output_key, inputs, state, changed):
+        outputs = []
+        for item in output_key.strip('.').split('...'):
+            component_id, prop = item.rsplit('.', 1)
+            outputs.append({'id': component_id, 'property': prop})
+        payload = {'output': output_key,
+                   'outputs': outputs if len(outputs) > 1 else outputs[0],
+                   'inputs': inputs,
+                   'state': state,
+                   'changedPropIds': [changed]}
+        start = time.perf_counter()
+        status, body = self.__post(payload)
+        self.latencies[name].append(time.perf_counter() - start)
+        if status != 200:
+            if status != 204:  # 204: callback raised PreventUpdate / no_update on all outputs
+                self.errors += 1
+            return
+        for component_id, props in json.loads(body).get('response', {}).items():
+            for prop, value in props.items():
+                self.__state[f'{component_id}.{prop}'] = value
+
+    def __checkboxes(self):
+        drivers = self.__state.get('drivers-data-store.data') or {}
+        ids = [{'type': 'drivers-checkbox', 'number': int(number)} for number in drivers]
+        values = [not self.__filtering or i < self.__filtered_drivers for i in range(len(ids))]
+        return ([{'id': i, 'property': 'id', 'value': i} for i in ids],
+                [{'id': i, 'property': 'value', 'value': v} for i, v in zip(ids, values)])
+
+    def change_year(self):
+        self.__call('change_year', self.__outputs['race-select.options'],
+                    [self.__prop('year-select', 'value')], [], 'year-select.value')
+
+    def change_race(self):
+        self.__call('change_race', self.__outputs['drivers-data-store.data'],
+                    [self.__prop('race-select', 'value')], [self.__prop('race-select', 'options')],
+                    'race-select.value')
+
+    def update_race_trace_page(self, trigger='drivers-data-store.data'):
+        self.__call('update_race_trace_page', self.__outputs['race-trace-graph.figure'],
+                    [self.__prop('refresh-timer', 'n_intervals'),
+                     self.__prop('refresh-button', 'n_clicks'),
+                     self.__prop('drivers-data-store', 'data')],
+                    [self.__prop('race-select', 'value'),
+                     self.__prop('race-data-store', 'data'),
+                     self.__prop('race-trace-graph', 'figure')],
+                    trigger)
+
+    def update_live_gaps_page(self, trigger='drivers-data-store.data'):
+        checkbox_ids, checkbox_values = self.__checkboxes()
+        self.__call('update_live_gaps_page' if trigger != 'filter-drivers-button.n_clicks' else 'filter_drivers',
+                    self.__outputs['live-gaps-graph.figure'],
+                    [self.__prop('refresh-timer', 'n_intervals'),
+                     self.__prop('filter-drivers-button', 'n_clicks'),
+                     self.__prop('refresh-button', 'n_clicks'),
+                     self.__prop('drivers-data-store', 'data')],
+                    [self.__prop('race-select', 'value'),
+                     self.__prop('race-data-store', 'data'),
+                     self.__prop('live-gaps-graph', 'figure'),
+                     self.__prop('data-interval-select', 'value'),
+                     checkbox_ids,
+                     checkbox_values],
+                    trigger)
+
+    def update_positions_page(self, trigger='drivers-data-store.data'):
+        self.__call('update_positions_page', self.__outputs['positions-graph.figure'],
+                    [self.__prop('refresh-timer', 'n_intervals'),
+                     self.__prop('refresh-button', 'n_clicks'),
+                     self.__prop('drivers-data-store', 'data')],
+                    [self.__prop('race-select', 'value'),
+                     self.__prop('race-data-store', 'data'),
+                     self.__prop('positions-graph', 'figure'),
+                     self.__prop('overtakes-graph', 'figure')],
+                    trigger)
+
+    def refresh_timer(self):
+        self.__state['refresh-timer.n_intervals'] = (self.__state.get('refresh-timer.n_intervals') or 0) + 1
+        self.update_race_trace_page('refresh-timer.n_intervals')
+        self.update_live_gaps_page('refresh-timer.n_intervals')
+        self.update_positions_page('refresh-timer.n_intervals')
+
+    def filter_drivers(self):
+        self.__state['filter-drivers-button.n_clicks'] = (self.__state.get('filter-drivers-button.n_clicks') or 0) + 1
+        self.__filtering = True
+        self.update_live_gaps_page('filter-drivers-button.n_clicks')
+
+    def run(self, iterations, refreshes):
+        """
+        Runs the scenario of a user opening the page, selecting a race, filtering drivers and following live updates
+        :param iterations: number of times the scenario is repeated
+        :param refreshes: number of live refreshes per scenario
+        """
+        for _ in range(iterations):
+            self.__filtering = False
+            self.change_year()
+            self.change_race()
+            self.update_race_trace_page()
+            self.update_live_gaps_page()
+            self.update_positions_page()
+            self.filter_drivers()
+            for _ in range(refreshes):
+                self.refresh_timer()
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile
+    :param values: list of values
+    :param p: percentile (0-100)
+    :return: percentile of the values, 0 if values is empty
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    # Nearest rank: smallest value such that at least p% of the values are lower or equal
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def to_mb(size):
+    """
+    :param size: size in bytes, or None
+    :return: size in MB rounded to 0.1, None if size is None
+    """
+    return round(size / 2 ** 20, 1) if size is not None else None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Load test of the raceEngineer Dash callbacks')
+    arg_parser.add_argument('--clients', default='1,2,4,8,16',
+                            help='comma separated numbers of simultaneous clients, one run per value')
+    arg_parser.add_argument('--iterations', type=int, default=3, help='scenario repetitions per client')
+    arg_parser.add_argument('--refreshes', type=int, default=3, help='live refreshes per scenario')
+    arg_parser.add_argument('--laps', type=int, default=57, help='laps of the synthetic sessions')
+    arg_parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data')
+    arg_parser.add_argument('--live-sessions', type=int, default=0,
+                            help='number of synthetic sessions which are live during the test; if set, each client '
+                                 'watches one of them (live refreshes are then queried), by default all sessions are '
+                                 'over and each client watches a random one')
+    arg_parser.add_argument('--no-prefetch', action='store_true',
+                            help='do not warm up the calendar and drivers cache before the in process test')
+    arg_parser.add_argument('--memory-budget', type=float, default=None,
+                            help='memory budget (MB) of the session manager of the in process test')
+    arg_parser.add_argument('--url', default=None,
+                            help='base url of a running instance (started with OPENF1_SERVER pointing to the stub '
+                                 'printed at startup); by default the app is loaded in process')
+    arg_parser.add_argument('--output', default=None, help='write the results to this json file')
+    args = arg_parser.parse_args()
+
+    # Sessions are dated from the start of the run: whether they are live does not depend on the day of the run
+    stub_args = {'years': available_years()[:stub_years], 'laps': args.laps, 'seed': args.seed,
+                 'reference': datetime.now(timezone.utc), 'live_sessions': args.live_sessions}
+    sessions = OpenF1Stub(**stub_args).sessions()  # same calendar as the stub server, data is generated on request
+    live_sessions = sessions[len(sessions) - args.live_sessions:] if args.live_sessions > 0 else []
+    port_queue = multiprocessing.Queue()
+    stub_process = multiprocessing.Process(target=run_stub_server, args=(stub_args, port_queue), daemon=True)
+    stub_process.start()
+    os.environ['OPENF1_SERVER'] = f'http://127.0.0.1:{port_queue.get()}/v1/'
+    print(f"OpenF1 stub listening on {os.environ['OPENF1_SERVER']}")
+    if args.memory_budget is not None:
+        os.environ['RACE_ENGINEER_MEMORY_BUDGET_MB'] = str(args.memory_budget)
+
+    # Imported here so that the app picks up the stub data source
+    from plotly.io import to_json
+    from src import layout
+    from src.app import app
+    from src.race_cache import race_cache
+    app.layout = layout.get_layout()
+    if not args.no_prefetch:
+        race_cache.warm_up()  # as done at server start
+    initial_state = {'race-trace-graph.figure': json.loads(to_json(layout.race_trace_graph.figure)),
+                     'live-gaps-graph.figure': json.loads(to_json(layout.live_gaps_graph.figure)),
+                     'positions-graph.figure': json.loads(to_json(layout.positions_graph.figure)),
+                     'overtakes-graph.figure': json.loads(to_json(layout.overtakes_graph.figure)),
+                     'data-interval-select.value': layout.data_interval_select.value,
+                     'race-data-store.data': {},
+                     'drivers-data-store.data': {}}
+
+    def poster():
+        if args.url:
+            session = requests.Session()
+            url = f"{args.url.rstrip('/')}/_dash-update-component"
+            return lambda payload: (lambda r: (r.status_code, r.content))(session.post(url, json=payload))
+        client = app.server.test_client()
+        return lambda payload: (lambda r: (r.status_code, r.data))(
+            client.post('/_dash-update-component', json=payload))
+
+    def session_stats():
+        if args.url:
+            stats = requests.get(f"{args.url.rstrip('/')}/stats/sessions").json()
+        else:
+            stats = app.server.test_client().get('/stats/sessions').get_json()
+        stats.pop('sessions', None)
+        return stats
+
+    results = []
+    header = f"{'clients':>7} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} " \
+             f"{'rss MB':>8} {'peak MB':>8} {'data MB':>8}"
+    if args.url:
+        print("Memory (rss, peak): server process")
+    else:
+        print("Memory (rss, peak): process running both the app and the load test harness")
+    print(header)
+    for n_clients in [int(n) for n in args.clients.split(',')]:
+        rng = random.Random(args.seed + n_clients)
+        clients = []
+        for i in range(n_clients):
+            session = live_sessions[i % len(live_sessions)] if live_sessions else rng.choice(sessions)
+            clients.append(DashClient(poster(), app.callback_map, initial_state, session['year'],
+                                      session['session_key']))
+        threads = [threading.Thread(target=client.run, args=(args.iterations, args.refreshes)) for client in clients]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+
+        latencies = defaultdict(list)
+        for client in clients:
+            for name, values in client.latencies.items():
+                latencies[name].extend(values)
+        all_latencies = [value for values in latencies.values() for value in values]
+        result = {'clients': n_clients,
+                  'requests': len(all_latencies),
+                  'errors': sum(client.errors for client in clients),
+                  'duration_s': round(duration, 3),
+                  'throughput_rps': round(len(all_latencies) / duration, 2),
+                  'session_manager': session_stats(),
+                  'latency_ms': {name: {'count': len(values),
+                                        'p50': round(percentile(values, 50) * 1000, 1),
+                                        'p95': round(percentile(values, 95) * 1000, 1),
+                                        'p99': round(percentile(values, 99) * 1000, 1),
+                                        'median': round(median(values) * 1000, 1)}
+                                 for name, values in sorted(latencies.items())}}
+        result['latency_ms']['all'] = {'count': len(all_latencies),
+                                       'p50': round(percentile(all_latencies, 50) * 1000, 1),
+                                       'p95': round(percentile(all_latencies, 95) * 1000, 1),
+                                       'p99': round(percentile(all_latencies, 99) * 1000, 1),
+                                       'median': round(median(all_latencies) * 1000, 1)}
+        # Memory of the server process (--url) or of the process including the harness (in process)
+        result['memory_source'] = 'server' if args.url else 'process including harness'
+        # None (printed as '-') when the memory cannot be read on the platform
+        result['rss_mb'] = to_mb(result['session_manager']['process_rss'])
+        result['peak_rss_mb'] = to_mb(result['session_manager']['process_peak_rss'])
+        results.append(result)
+        total = result['latency_ms']['all']
+        data_mb = to_mb(result['session_manager']['memory_used'])
+        rss, peak_rss = ('-' if size is None else size for size in (result['rss_mb'], result['peak_rss_mb']))
+        print(f"{n_clients:>7} {result['requests']:>8} {result['errors']:>6} {result['throughput_rps']:>8} "
+              f"{total['p50']:>8} {total['p95']:>8} {total['p99']:>8} {rss:>8} {peak_rss:>8} {data_mb:>8}")
+        for name, values in result['latency_ms'].items():
+            if name != 'all':
+                print(f"{'':>7} {name:<30} p50 {values['p50']:>8} p95 {values['p95']:>8} p99 {values['p99']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    stub_process.terminate()
+
+
+if __name__ == '__main__':
+    main()
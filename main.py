@@ -1,7 +1,9 @@
 from src.layout import get_layout
 from src.app import app
+from src.race_cache import race_cache
 
 if __name__ == '__main__':
     app.layout = get_layout()
+    race_cache.start()  # prefetch calendars and drivers, then refresh them periodically
     # app.run(debug=True)
     app.run_server(host = '0.0.0.0', debug = False)
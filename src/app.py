@@ -1,5 +1,21 @@
 import dash
 import dash_bootstrap_components as dbc
+from flask import jsonify
+
+from src.session_manager import session_manager
+from src.utils import process_memory
 
 # Initialize the Dash app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SLATE])
+
+
+@app.server.route('/stats/sessions')
+def session_stats():
+    """
+    Exposes the statistics of the session manager (memory budget and usage, evictions, etc.) and the memory of the
+    server process
+    :return: json formatted statistics
+    """
+    stats = session_manager.stats()
+    stats['process_rss'], stats['process_peak_rss'] = process_memory()
+    return jsonify(stats)
@@ -7,6 +7,7 @@ from plotly import graph_objs as go
 from src import utils
 from src.app import app
 from src.enums import DataInterval
+from src.race_cache import race_cache
 from src.race_data import RaceData
 from src.utils import is_float
 
@@ -30,8 +31,7 @@ def change_race(selected_race, races):
             race_title = race['label']
             break
 
-    race = RaceData(selected_race)
-    drivers = race.get_drivers()
+    drivers = race_cache.get_drivers(selected_race)
 
     return drivers if drivers else no_update, race_title
 
@@ -146,6 +146,7 @@ def update_live_gaps_page(_refresh_timer,
     live_gaps_graph = go.Figure(live_gaps_graph)
     last_update_text = f"Last updated on {utils.timestamp_formatted()}"
     driver_positions = race.get_driver_positions()
+    classification = driver_positions.classification()
     driver_positions_table = []
     if not driver_positions:
         last_update_text += " (no pos)"
@@ -172,7 +173,7 @@ def update_live_gaps_page(_refresh_timer,
                                           selector=({'name': drivers[driver_id]['name_acronym']}))
             # Build the driver positions table
             driver_positions_table.append({
-                'position': driver_positions[driver_id]['current'] if driver_positions else None,
+                'position': classification.get(driver_id),
                 'last_name': drivers[driver_id]['last_name'],
                 'number': driver_id,
                 'gap_leader': gap_leader,
@@ -190,6 +191,81 @@ def update_live_gaps_page(_refresh_timer,
             last_update_text)
 
 
+@app.callback(Output('positions-graph', 'figure'),
+              Output('overtakes-graph', 'figure'),
+              Output('last-update-p3-text', 'children'),
+              Input('refresh-timer', 'n_intervals'),
+              Input("refresh-button", "n_clicks"),
+              Input('drivers-data-store', 'data'),
+              State('race-select', 'value'),
+              State('race-data-store', 'data'),
+              State('positions-graph', 'figure'),
+              State('overtakes-graph', 'figure'),
+              running=[(Output("loading_indicator", "display"), "show", "hide")],
+              prevent_initial_call=True
+              )
+def update_positions_page(_refresh_timer,
+                          _refresh_btn,
+                          stored_drivers_data,
+                          selected_race,
+                          selected_race_title,
+                          positions_graph,
+                          overtakes_graph):
+    """
+    Loads the positions page
+    :param _refresh_timer: (trigger only) timer of the live auto refresh
+    :param _refresh_btn: (trigger only) refresh button
+    :param stored_drivers_data: drivers data
+    :param selected_race: id of the selected race
+    :param selected_race_title: title of the selected race
+    :param positions_graph: figure of the positions graph
+    :param overtakes_graph: figure of the overtakes graph
+    :return: updated positions_graph, overtakes_graph, last update text
+    """
+    race = RaceData(selected_race)
+    driver_positions = race.get_driver_positions()
+    drivers = {int(i): v for i, v in stored_drivers_data.items()}
+    positions_graph = go.Figure(positions_graph)
+    overtakes_graph = go.Figure(overtakes_graph)
+    last_update_text = f"Last updated on {utils.timestamp_formatted()}"
+    activator = dash.ctx.triggered_id
+    if activator in ('drivers-data-store', 'refresh-button'):
+        # If the drivers data is changed (new race selected), the graph title and traces are reloaded
+        positions_graph.layout.title = selected_race_title
+        positions_graph.data = []
+        for driver in drivers.values():
+            positions_graph.add_trace(go.Scattergl(
+                x=[],  # x-axis: time
+                y=[],  # y-axis: position
+                mode='lines',
+                line_shape='hv',  # positions change in steps
+                name=driver['name_acronym'],
+                line_color=driver['team_colour']
+            ))
+        overtakes_graph.data = []
+        overtakes_graph.add_trace(go.Bar(x=[], y=[], name='Overtakes', marker_color='#999999'))
+    # Update the traces of the positions graph
+    if driver_positions:
+        end = driver_positions.end()
+        for driver_id, driver in drivers.items():
+            dates, positions = driver_positions.driver_changes(driver_id)
+            if positions:
+                # The last position is held until the latest data
+                dates.append(end)
+                positions.append(positions[-1])
+            positions_graph.update_traces(dict(x=dates, y=positions),
+                                          selector=({'name': driver['name_acronym']}))
+        overtakes = driver_positions.overtakes_per_lap(race.get_lap_starts())
+        overtakes_graph.update_traces(dict(x=list(overtakes.keys()), y=list(overtakes.values())),
+                                      selector=({'name': 'Overtakes'}))
+    else:
+        last_update_text += " (no pos)"
+
+    return (positions_graph if driver_positions else no_update,
+            overtakes_graph if driver_positions else no_update,
+            last_update_text)
+
+
 @app.callback(
     Output("refresh-rate-fade", "is_in"),
     Output("refresh-rate-label-fade", "is_in"),
@@ -239,8 +315,7 @@ def change_year(year):
     :param year: selected year
     :return: list of races formatted for the dropdown
     """
-    data = RaceData()
-    races = data.get_races_of_year(year)
+    races = race_cache.get_races_of_year(year)
     races_list = [{'label': f'{race_item["country_name"]} - {race_item["location"]} - {race_item["session_name"]}',
                    'value': race_id}
                   for (race_id, race_item) in races.items()]
@@ -280,7 +355,8 @@ def draw_drivers_gap_table(driver_positions_table, selection, sorting_key='posit
     empty_selection = len(selection) == 0
     leader_is_set = False
     gap_delta_leader = gap_delta_interval = 0
-    for driver in sorted(driver_positions_table, key=lambda x: x[sorting_key]):
+    # Drivers without a value of the sorting key (e.g. not classified yet) are displayed last
+    for driver in sorted(driver_positions_table, key=lambda x: (x[sorting_key] is None, x[sorting_key] or 0)):
         if not leader_is_set:
             if empty_selection or driver['number'] in selection:
                 # this is the leader of the selection
@@ -3,7 +3,7 @@ from dash import html, dcc
 from plotly import graph_objs as go
 
 from src.enums import DataInterval
-from src.utils import current_year
+from src.utils import available_years, current_year
 import src.callbacks
 
 title = "raceEngineer"
@@ -47,8 +47,43 @@ live_gaps_graph = dcc.Graph(id='live-gaps-graph',
                                     paper_bgcolor='rgba(0,0,0,0)',
                                     font_color='#999999')))
 
+positions_graph = dcc.Graph(id='positions-graph',
+                            figure=go.Figure(
+                                layout=go.Layout(
+                                    xaxis={'title': 'Time',
+                                           'zeroline': False,
+                                           'gridcolor': '#333333'},
+                                    yaxis={'title': 'Position',
+                                           'autorange': 'reversed',
+                                           'tick0': 1,
+                                           'dtick': 1,
+                                           'zeroline': False,
+                                           'gridcolor': '#333333'},
+                                    hovermode='closest',
+                                    height=800,
+                                    plot_bgcolor='#111111',
+                                    paper_bgcolor='rgba(0,0,0,0)',
+                                    font_color='#999999')))
+
+overtakes_graph = dcc.Graph(id='overtakes-graph',
+                            figure=go.Figure(
+                                layout=go.Layout(
+                                    xaxis={'title': 'Lap Number',
+                                           'minallowed': 0,
+                                           'zeroline': False,
+                                           'gridcolor': '#333333'},
+                                    yaxis={'title': 'Overtakes',
+                                           'zeroline': False,
+                                           'gridcolor': '#333333'},
+                                    hovermode='closest',
+                                    height=300,
+                                    plot_bgcolor='#111111',
+                                    paper_bgcolor='rgba(0,0,0,0)',
+                                    font_color='#999999')))
+
 last_update_p1_text = html.Small(id="last-update-p1-text", className="text-muted")
 last_update_p2_text = html.Small(id="last-update-p2-text", className="text-muted")
+last_update_p3_text = html.Small(id="last-update-p3-text", className="text-muted")
 
 refresh_timer = dcc.Interval(
     id='refresh-timer',
@@ -86,16 +121,21 @@ tab2 = [html.Div(html.Div([live_gaps_table, filter_drivers_button]),
         html.Div(html.Div([live_gaps_graph, last_update_p2_text]),
                  style={'width': '75%', 'display': 'inline-block'})]
 
+tab3 = html.Div([positions_graph,
+                 overtakes_graph,
+                 last_update_p3_text])
+
 tabs = dbc.Tabs(
     [
         dbc.Tab(tab1, label="Race Trace"),
-        dbc.Tab(tab2, label="Live Gaps")
+        dbc.Tab(tab2, label="Live Gaps"),
+        dbc.Tab(tab3, label="Positions")
     ]
 )
 
 main_fade = dbc.Fade(dbc.Card(tabs, className="mt-3"), id="main-fade", is_in=False, appear=True)
 
-year_select = dbc.Select(list(range(current_year(), 2022, -1)), current_year(), id="year-select", size="sm")
+year_select = dbc.Select(available_years(), current_year(), id="year-select", size="sm")
 race_select = dbc.Select(placeholder="Select a race", id="race-select", size="sm")
 refresh_button = dbc.Button("Refresh", id="refresh-button", size="sm")
 refresh_button_fade = dbc.Fade(refresh_button, id="refresh-button-fade", is_in=False, appear=True)
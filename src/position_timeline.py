@@ -0,0 +1,195 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from dateutil import parser
+
+
+class PositionTimeline:
+    """
+    Run-length timeline of the driver positions: per driver, only the changes of position are kept (time, position).
+    All the changes are also indexed by time, so that classifications, position changes and overtakes can be looked up
+    with binary searches. The timeline is updated incrementally as new position data arrives.
+    Times are stored as UTC timestamps (seconds).
+    """
+
+    def __init__(self):
+        self.__times = {}  # driver: sorted list of the times of the position changes
+        self.__positions = {}  # driver: list of positions, aligned with the times
+        self.__change_times = []  # sorted list of the times of the position changes of all drivers
+        self.__changes = []  # (driver, previous position, new position), aligned with the change times
+        self.__gains = None  # prefix sums of the overtakes (position gains) over the changes, built when needed
+        self.last_date = None  # date of the latest data added, as provided by the data source
+        self.__last_time = None  # time of the latest data added
+        # The timeline is shared by the clients: readers and writers use the lock (reentrant, readers call each other)
+        self.__lock = threading.RLock()
+
+    def __getstate__(self):
+        with self.__lock:
+            state = {key: value for key, value in self.__dict__.items() if key != '_PositionTimeline__lock'}
+            # Copies of the containers, as they may be updated by other clients while pickling
+            for key in ('_PositionTimeline__times', '_PositionTimeline__positions'):
+                state[key] = {driver: list(values) for driver, values in state[key].items()}
+            for key in ('_PositionTimeline__change_times', '_PositionTimeline__changes', '_PositionTimeline__gains'):
+                state[key] = list(state[key]) if state[key] is not None else None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.RLock()
+
+    def __bool__(self):
+        with self.__lock:
+            return bool(self.__positions)
+
+    @staticmethod
+    def to_timestamp(date):
+        """
+        Converts a date to a UTC timestamp
+        :param date: iso formatted date, datetime or timestamp
+        :return: timestamp (seconds)
+        """
+        if isinstance(date, (int, float)):
+            return float(date)
+        if isinstance(date, str):
+            date = parser.isoparse(date)
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return date.timestamp()
+
+    @staticmethod
+    def to_datetime(time):
+        """
+        Converts a UTC timestamp to a datetime
+        :param time: timestamp (seconds)
+        :return: datetime (UTC)
+        """
+        return datetime.fromtimestamp(time, timezone.utc)
+
+    def add(self, position_data):
+        """
+        Adds position data to the timeline. Data older than the latest change of a driver is ignored.
+        :param position_data: list of position items from the data source (driver_number, date, position)
+        """
+        # Dates are compared once parsed: their format may vary (e.g. with or without fractional seconds)
+        position_data = sorted(((self.to_timestamp(position_item['date']), position_item)
+                                for position_item in position_data), key=lambda x: x[0])
+        with self.__lock:
+            for time, position_item in position_data:
+                driver = position_item['driver_number']
+                position = position_item['position']
+                if self.__last_time is None or time > self.__last_time:
+                    self.__last_time = time
+                    self.last_date = position_item['date']
+                positions = self.__positions.setdefault(driver, [])
+                if positions and positions[-1] == position:
+                    continue  # no change of position
+                times = self.__times.setdefault(driver, [])
+                if times and time < times[-1]:
+                    continue  # older than the latest change of the driver
+                times.append(time)
+                positions.append(position)
+                change = (driver, positions[-2] if len(positions) > 1 else None, position)
+                if not self.__change_times or time >= self.__change_times[-1]:
+                    self.__change_times.append(time)
+                    self.__changes.append(change)
+                    if self.__gains is not None:
+                        self.__gains.append(self.__gains[-1] + self.__is_gain(change))
+                else:
+                    # Change older than the latest change of another driver: insert it in order
+                    index = bisect_right(self.__change_times, time)
+                    self.__change_times.insert(index, time)
+                    self.__changes.insert(index, change)
+                    self.__gains = None
+
+    @staticmethod
+    def __is_gain(change):
+        _driver, previous_position, position = change
+        return previous_position is not None and position < previous_position
+
+    def current(self, driver):
+        """
+        :param driver: driver number
+        :return: the latest position of the driver, None if not available
+        """
+        with self.__lock:
+            positions = self.__positions.get(driver)
+            return positions[-1] if positions else None
+
+    def position_at(self, driver, date):
+        """
+        :param driver: driver number
+        :param date: iso formatted date, datetime or timestamp
+        :return: the position of the driver at the given date, None if not available
+        """
+        time = self.to_timestamp(date)
+        with self.__lock:
+            index = bisect_right(self.__times.get(driver, []), time) - 1
+            return self.__positions[driver][index] if index >= 0 else None
+
+    def classification(self, date=None):
+        """
+        Returns the classification at a given date
+        :param date: iso formatted date, datetime or timestamp; if None, the current classification is returned
+        :return: dict with driver: position, ordered by position
+        """
+        with self.__lock:
+            if date is None:
+                classification = {driver: positions[-1] for driver, positions in self.__positions.items() if positions}
+            else:
+                classification = {}
+                for driver in self.__positions:
+                    position = self.position_at(driver, date)
+                    if position is not None:
+                        classification[driver] = position
+        return dict(sorted(classification.items(), key=lambda x: x[1]))
+
+    def changes_between(self, date_from, date_to):
+        """
+        Returns the position changes between two dates (included)
+        :param date_from: iso formatted date, datetime or timestamp
+        :param date_to: iso formatted date, datetime or timestamp
+        :return: list of (time, driver, previous position, new position), ordered by time
+        """
+        time_from, time_to = self.to_timestamp(date_from), self.to_timestamp(date_to)
+        with self.__lock:
+            start = bisect_left(self.__change_times, time_from)
+            end = bisect_right(self.__change_times, time_to)
+            return [(self.__change_times[i], *self.__changes[i]) for i in range(start, end)]
+
+    def overtakes_per_lap(self, lap_starts):
+        """
+        Counts the overtakes (position gains) of each lap
+        :param lap_starts: dict with lap number: start of the lap (iso formatted date, datetime or timestamp)
+        :return: dict with lap number: number of overtakes
+        """
+        laps = sorted((self.to_timestamp(start), lap) for lap, start in lap_starts.items())
+        overtakes = {}
+        with self.__lock:
+            if self.__gains is None:
+                self.__gains = [0]
+                for change in self.__changes:
+                    self.__gains.append(self.__gains[-1] + self.__is_gain(change))
+            for i, (start, lap) in enumerate(laps):
+                # Overtakes of the lap: changes from the start of the lap to the start of the next one (excluded)
+                start_index = bisect_left(self.__change_times, start)
+                end_index = (bisect_left(self.__change_times, laps[i + 1][0]) if i + 1 < len(laps)
+                             else len(self.__change_times))
+                overtakes[lap] = self.__gains[end_index] - self.__gains[start_index]
+        return overtakes
+
+    def driver_changes(self, driver):
+        """
+        :param driver: driver number
+        :return: list of the dates (datetime) of the position changes of the driver, list of the positions
+        """
+        with self.__lock:
+            times, positions = list(self.__times.get(driver, [])), list(self.__positions.get(driver, []))
+        return [self.to_datetime(time) for time in times], positions
+
+    def end(self):
+        """
+        :return: date (datetime) of the latest data of the timeline, None if empty
+        """
+        with self.__lock:
+            return self.to_datetime(self.__last_time) if self.__last_time is not None else None
@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from dateutil import parser
+
+from src.logger import logger
+from src.race_data import RaceData
+from src.utils import available_years
+
+default_refresh_interval = 3600  # refresh the calendar every x seconds
+default_retry_interval = 60  # query again missing (empty or failed) data after x seconds
+
+
+class RaceCache:
+    """
+    In-memory copy of the season calendars and of the driver rosters of their sessions, shared by all clients.
+    The cache is warmed up at server start and refreshed periodically, so that the year and race selections are served
+    from memory instead of querying the data source once per client.
+    """
+
+    def __init__(self, retry_interval=default_retry_interval):
+        """
+        :param retry_interval: seconds during which data found missing (empty or failed query) is not queried again
+        """
+        self.__races_years = {}  # year: races of the year, as returned by RaceData
+        self.__drivers = {}  # race id: drivers of the race, as returned by RaceData
+        self.__missing = {}  # key: time (monotonic) of the latest query which returned no data
+        self.__retry_interval = retry_interval
+        self.__lock = threading.Lock()
+        self.__fetch_locks = {}  # key: lock, makes concurrent requests of the same missing data wait for one fetch
+        self.__refresh_thread = None
+
+    def __fetch_lock(self, key):
+        with self.__lock:
+            return self.__fetch_locks.setdefault(key, threading.Lock())
+
+    def __recently_missing(self, key):
+        """
+        :param key: key of the data
+        :return: True if the latest query of the data returned no data less than retry_interval ago
+        """
+        missing_since = self.__missing.get(key)
+        return missing_since is not None and time.monotonic() - missing_since < self.__retry_interval
+
+    def get_races_of_year(self, year):
+        """
+        Returns the races (+sprints) of a year, querying the data source only if they are not in memory yet.
+        If the latest query returned no data, the data source is not queried again before retry_interval.
+        :param year: year of the races
+        :return: dict with races of the year
+        """
+        year = int(year)
+        if year not in self.__races_years and not self.__recently_missing(('races', year)):
+            with self.__fetch_lock(('races', year)):
+                # May have been fetched while waiting for the lock
+                if year not in self.__races_years and not self.__recently_missing(('races', year)):
+                    self.__fetch_races_of_year(year)
+        return self.__races_years.get(year, {})
+
+    def get_drivers(self, race_id):
+        """
+        Returns the drivers of a race, querying the data source only if they are not in memory yet.
+        If the latest query returned no data, the data source is not queried again before retry_interval.
+        The drivers of the 'latest' session are never cached, as the latest session changes over time.
+        :param race_id: id of the race
+        :return: dict with drivers of the race
+        """
+        race_id = str(race_id)
+        if race_id == 'latest':
+            return RaceData(race_id).get_drivers()
+        if race_id not in self.__drivers and not self.__recently_missing(('drivers', race_id)):
+            with self.__fetch_lock(('drivers', race_id)):
+                if race_id not in self.__drivers and not self.__recently_missing(('drivers', race_id)):
+                    self.__fetch_drivers(race_id)
+        return self.__drivers.get(race_id, {})
+
+    def __fetch_races_of_year(self, year):
+        races = RaceData().get_races_of_year(year)
+        if races:  # on failure the previous data (if any) is kept
+            self.__races_years[year] = races
+            self.__missing.pop(('races', year), None)
+        else:
+            self.__missing[('races', year)] = time.monotonic()
+        return races
+
+    def __fetch_drivers(self, race_id):
+        drivers = RaceData(race_id).get_drivers()
+        if drivers:
+            self.__drivers[race_id] = drivers
+            self.__missing.pop(('drivers', race_id), None)
+        else:
+            self.__missing[('drivers', race_id)] = time.monotonic()
+        return drivers
+
+    def warm_up(self, refresh=False):
+        """
+        Loads the calendars of all the available years and the drivers of their sessions.
+        :param refresh: if True, calendars are reloaded and so are the drivers of sessions which are not over yet.
+        Otherwise, only data which is not in memory yet is loaded.
+        """
+        now = datetime.now(timezone.utc)
+        loaded_races = loaded_drivers = 0
+        for year in available_years():
+            if refresh or year not in self.__races_years:
+                self.__fetch_races_of_year(year)
+                loaded_races += 1
+            for race_id, race in self.__races_years.get(year, {}).items():
+                race_id = str(race_id)
+                date_start = parser.isoparse(race['date_start']) if race.get('date_start') else now
+                if date_start > now:
+                    continue  # future session: drivers are not available yet
+                date_end = parser.isoparse(race['date_end']) if race.get('date_end') else now
+                if race_id not in self.__drivers or (refresh and date_end > now - timedelta(days=1)):
+                    self.__fetch_drivers(race_id)
+                    loaded_drivers += 1
+        logger.info(f"Race cache {'refreshed' if refresh else 'warmed up'}: {loaded_races} calendars, "
+                    f"{loaded_drivers} driver rosters loaded")
+
+    def start(self, refresh_interval=default_refresh_interval):
+        """
+        Warms up the cache and refreshes it periodically in a background thread
+        :param refresh_interval: seconds between two refreshes
+        """
+        if self.__refresh_thread is not None:
+            return
+        self.__refresh_thread = threading.Thread(target=self.__refresh_loop, args=(refresh_interval,),
+                                                 name='race-cache-refresh', daemon=True)
+        self.__refresh_thread.start()
+
+    def __refresh_loop(self, refresh_interval):
+        refresh = False
+        while True:
+            try:
+                self.warm_up(refresh)
+            except Exception as e:
+                logger.error(f"Race cache refresh failed: {e}")
+            refresh = True
+            time.sleep(refresh_interval)
+
+
+race_cache = RaceCache()
@@ -1,4 +1,6 @@
+import os
 from collections import defaultdict
+from datetime import datetime, timezone, timedelta
 from statistics import mean, median
 
 import requests
@@ -7,14 +9,19 @@ from dateutil import parser
 import src.utils as utils
 from src.enums import Operation, DataInterval
 from src.logger import logger
+from src.position_timeline import PositionTimeline
+from src.session_manager import session_manager
 from src.utils import get_hex_color, time_iso
 
 
+live_margin = timedelta(hours=1)  # a session is considered live until x after its scheduled end
+
+
 class RaceData:
 
     def __init__(self, race_id='latest'):
         self.__race_id = race_id
-        self.__server = 'https://api.openf1.org/v1/'  # Data source
+        self.__server = os.environ.get('OPENF1_SERVER', 'https://api.openf1.org/v1/')  # Data source
         # Query results are stored in the following instance variables and can be processed by other methods
         self.__data_races_year = {}
         self.__data_race_event = {}
@@ -44,6 +51,40 @@ class RaceData:
             self.__log_query(request_text, f'Error retrieving data: {e}')
             return False
 
+    def __session_request(self, request_text):
+        """
+        Perform API request to get data of the race session.
+        Data of sessions which are over does not change anymore: it is kept by the session manager and the data source
+        is queried only once. Data of live sessions is always queried, and kept by the session manager as well: once the
+        session is over, that data is dropped by the session manager and the final data is queried again.
+        :param request_text: full text of the GET request, including parameters
+        :return: json formatted data, False if not successful
+        """
+        if self.__race_id == 'latest':
+            return self.__api_request(request_text)  # the latest session changes over time, it is not kept
+        live_until = self.__live_until(self.get_race_event())
+        if live_until is None:
+            data = session_manager.get(self.__race_id, request_text)
+            if data is not None:
+                return data
+        data = self.__api_request(request_text)
+        if data:
+            session_manager.put(self.__race_id, request_text, data, live_until)
+        return data
+
+    @staticmethod
+    def __live_until(race_event):
+        """
+        Returns until when a session is considered live
+        :param race_event: race event data, as returned by get_race_event
+        :return: datetime until which the session is live, None if the session is over
+        """
+        now = datetime.now(timezone.utc)
+        if not race_event.get('date_end'):
+            return now + live_margin  # unknown end: considered live
+        live_until = parser.isoparse(race_event['date_end']) + live_margin
+        return live_until if live_until > now else None
+
     def __log_query(self, request_text, text):
         """
         Prints a message in the log including the API request
@@ -71,7 +112,17 @@ class RaceData:
         :return: dict with query result
         """
         race_event = {}
-        self.__data_race_event = self.__api_request(f'sessions?session_key={self.__race_id}')
+        request_text = f'sessions?session_key={self.__race_id}'
+        if self.__race_id == 'latest':
+            self.__data_race_event = self.__api_request(request_text)
+        else:
+            # The session event does not change: once queried it is kept by the session manager
+            self.__data_race_event = session_manager.get(self.__race_id, request_text)
+            if self.__data_race_event is None:
+                self.__data_race_event = self.__api_request(request_text)
+                if self.__data_race_event:
+                    session_manager.put(self.__race_id, request_text, self.__data_race_event,
+                                        self.__live_until(self.__data_race_event[-1]))
         if self.__data_race_event:
             for race_event_item in self.__data_race_event:  # using for but this should only be 1 line
                 race_event = race_event_item
@@ -84,7 +135,7 @@ class RaceData:
         :return: dict with query result
         """
         drivers = {}
-        self.__data_drivers = self.__api_request(f'drivers?session_key={self.__race_id}')
+        self.__data_drivers = self.__session_request(f'drivers?session_key={self.__race_id}')
         if self.__data_drivers:
             for driver_item in self.__data_drivers:
                 drivers[driver_item['driver_number']] = {
@@ -106,7 +157,7 @@ class RaceData:
         :return: dict with query result
         """
         driver_laps = defaultdict(lambda: {0: 0.0})  # make all drivers start at 0 in lap 0
-        self.__data_driver_laps = self.__api_request(f'laps?session_key={self.__race_id}')
+        self.__data_driver_laps = self.__session_request(f'laps?session_key={self.__race_id}')
         if self.__data_driver_laps:
             for lap_item in self.__data_driver_laps:
                 if lap_item['lap_number'] == 2:
@@ -121,17 +172,55 @@ class RaceData:
     def get_driver_positions(self):
         """
         Queries data source about driver positions from a race event.
-        Per driver (id is number), returns a dict with positions over time, and the current position
-        :return: dict with query result
+        Returns a timeline with the position changes of the drivers. The timeline is kept by the session manager: if the
+        session is live, only the data newer than the latest data of the timeline is queried and added to it. Once the
+        session is over, the timeline is queried once more in full.
+        :return: PositionTimeline with query result
         """
-        driver_positions = defaultdict(dict)
-        self.__data_driver_positions = self.__api_request(f'position?session_key={self.__race_id}')
+        request_text = f'position?session_key={self.__race_id}'
+        if self.__race_id == 'latest':
+            driver_positions = PositionTimeline()
+            self.__data_driver_positions = self.__api_request(request_text)
+            if self.__data_driver_positions:
+                driver_positions.add(self.__data_driver_positions)
+            return driver_positions
+        live_until = self.__live_until(self.get_race_event())
+        # A timeline built while the session was live is dropped by the session manager once the session is over:
+        # it is then queried again in full, so that a timeline is served as final only if queried after the end
+        driver_positions = session_manager.get(self.__race_id, 'position_timeline')
+        if driver_positions is not None and live_until is None:
+            return driver_positions
+        if driver_positions is None:
+            driver_positions = PositionTimeline()
+        elif driver_positions.last_date:
+            # Dates are sent in UTC without time zone ('+' is not allowed in the request)
+            last_date = PositionTimeline.to_datetime(PositionTimeline.to_timestamp(driver_positions.last_date))
+            request_text += f'&date>={last_date.replace(tzinfo=None).isoformat(timespec="microseconds")}'
+        self.__data_driver_positions = self.__api_request(request_text)
         if self.__data_driver_positions:
-            for position_item in self.__data_driver_positions:
-                driver_positions[position_item['driver_number']]['current'] = position_item['position']
-                driver_positions[position_item['driver_number']][position_item['date']] = position_item['position']
+            driver_positions.add(self.__data_driver_positions)
+        if driver_positions:
+            session_manager.put(self.__race_id, 'position_timeline', driver_positions, live_until)
         return driver_positions
 
+    def get_lap_starts(self):
+        """
+        Queries data source about driver laps from a race event.
+        Returns a dict with lap: start of the lap for the leader (earliest start amongst the drivers)
+        :return: dict with query result
+        """
+        lap_starts = {}  # lap: (timestamp, date) of the start
+        self.__data_driver_laps = self.__session_request(f'laps?session_key={self.__race_id}')
+        if self.__data_driver_laps:
+            for lap_item in self.__data_driver_laps:
+                if not lap_item['date_start']:
+                    continue
+                # Dates are compared once parsed: their format may vary (e.g. with or without fractional seconds)
+                time = PositionTimeline.to_timestamp(lap_item['date_start'])
+                if lap_item['lap_number'] not in lap_starts or time < lap_starts[lap_item['lap_number']][0]:
+                    lap_starts[lap_item['lap_number']] = (time, lap_item['date_start'])
+        return {lap: date for lap, (_time, date) in sorted(lap_starts.items())}
+
     def get_driver_intervals(self, data_filter=DataInterval.OFF.value):
         """
         Queries data source about driver intervals (gaps from leader and intervals) from a race event.
@@ -144,7 +233,11 @@ class RaceData:
             param = ''
         else:
             param = f'&date>={time_iso(-int(data_filter) * 60)}'  # Filter is in minutes, API wants seconds
-        self.__data_driver_intervals = self.__api_request(f'intervals?session_key={self.__race_id}{param}')
+        if param:
+            # Data filtered on the current time cannot be reused: not kept by the session manager
+            self.__data_driver_intervals = self.__api_request(f'intervals?session_key={self.__race_id}{param}')
+        else:
+            self.__data_driver_intervals = self.__session_request(f'intervals?session_key={self.__race_id}')
         if self.__data_driver_intervals:
             for interval_item in self.__data_driver_intervals:
                 driver_intervals[interval_item['driver_number']]['leader'][interval_item['date']] = interval_item[
@@ -0,0 +1,172 @@
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from src.logger import logger
+from src.utils import deep_sizeof
+
+default_memory_budget = 512  # MB, can be overridden with the environment variable RACE_ENGINEER_MEMORY_BUDGET_MB
+
+
+class SessionManager:
+    """
+    Keeps the data of the sessions (query results, per session and per query) in memory within a memory budget.
+    When the budget is exceeded, the least recently viewed sessions are evicted first: their data is spilled to disk
+    (and loaded back when the session is viewed again) or dropped if that is not possible.
+    Sessions which are currently live are never evicted. Once a live session is over, the data queried while it was
+    live is dropped, so that the final data is queried again.
+    """
+
+    def __init__(self, memory_budget=None, spill_dir=None, clock=None):
+        """
+        :param memory_budget: memory budget in bytes, by default read from the environment or default_memory_budget
+        :param spill_dir: directory where evicted sessions are written, by default a new temporary directory
+        :param clock: function returning the current date (datetime, UTC), by default the system clock
+        """
+        self.__clock = clock or (lambda: datetime.now(timezone.utc))
+        if memory_budget is None:
+            memory_budget = int(float(os.environ.get('RACE_ENGINEER_MEMORY_BUDGET_MB', default_memory_budget))
+                                * 2 ** 20)
+        self.__memory_budget = memory_budget
+        self.__spill_dir = spill_dir or os.environ.get('RACE_ENGINEER_SPILL_DIR')
+        # race id: {'data': {key: data}, 'sizes': {key: bytes}, 'live_until': datetime or None},
+        # ordered from the least to the most recently viewed
+        self.__sessions = OrderedDict()
+        self.__spilled = {}  # race id: path of the file with the spilled session
+        self.__memory_used = 0
+        self.__lock = threading.RLock()
+        self.__hits = self.__misses = self.__evictions = self.__spills = self.__reloads = self.__drops = 0
+
+    def get(self, race_id, key):
+        """
+        Returns data of a session, loading the session back from disk if it was spilled
+        :param race_id: id of the race
+        :param key: key of the data within the session (e.g. the query)
+        :return: the stored data, None if not available
+        """
+        race_id = str(race_id)
+        with self.__lock:
+            if race_id not in self.__sessions and race_id in self.__spilled:
+                self.__reload(race_id)
+            session = self.__sessions.get(race_id)
+            if session is not None and self.__session_has_ended(session):
+                # Data was queried while the session was live and may be partial: it is dropped, to be queried again
+                self.__drop(race_id)
+                session = None
+            if session is None or key not in session['data']:
+                self.__misses += 1
+                return None
+            self.__sessions.move_to_end(race_id)  # most recently viewed
+            self.__hits += 1
+            return session['data'][key]
+
+    def put(self, race_id, key, data, live_until=None):
+        """
+        Stores data of a session and evicts other sessions if the memory budget is exceeded
+        :param race_id: id of the race
+        :param key: key of the data within the session (e.g. the query)
+        :param data: data to be stored
+        :param live_until: datetime until which the session is considered live (never evicted), None if not live.
+        Data stored with live_until is dropped once that time has passed.
+        """
+        race_id = str(race_id)
+        size = deep_sizeof(data)  # estimated outside the lock
+        with self.__lock:
+            if race_id not in self.__sessions and race_id in self.__spilled:
+                self.__reload(race_id)
+            session = self.__sessions.setdefault(race_id, {'data': {}, 'sizes': {}, 'live_until': None})
+            self.__memory_used += size - session['sizes'].get(key, 0)
+            session['data'][key] = data
+            session['sizes'][key] = size
+            session['live_until'] = live_until
+            self.__sessions.move_to_end(race_id)
+            self.__enforce_budget()
+
+    def __session_is_live(self, session):
+        return session['live_until'] is not None and self.__clock() < session['live_until']
+
+    def __session_has_ended(self, session):
+        return session['live_until'] is not None and self.__clock() >= session['live_until']
+
+    def __drop(self, race_id):
+        session = self.__sessions.pop(race_id)
+        self.__memory_used -= sum(session['sizes'].values())
+        self.__drops += 1
+        logger.info(f"Session {race_id} is over, data queried while live dropped")
+
+    def __enforce_budget(self):
+        """
+        Evicts the least recently viewed sessions which are not live until the memory used is within the budget
+        """
+        if not self.__sessions:
+            return
+        viewed_race_id = next(reversed(self.__sessions))
+        for race_id in list(self.__sessions):
+            if self.__memory_used <= self.__memory_budget:
+                return
+            if race_id == viewed_race_id or self.__session_is_live(self.__sessions[race_id]):
+                continue  # the session being viewed and live sessions are kept in memory
+            self.__evict(race_id)
+        if self.__memory_used > self.__memory_budget:
+            logger.warning(f"Memory budget exceeded by sessions which cannot be evicted: "
+                           f"{self.__memory_used / 2 ** 20:.1f} MB used, "
+                           f"{self.__memory_budget / 2 ** 20:.1f} MB budget")
+
+    def __evict(self, race_id):
+        session = self.__sessions.pop(race_id)
+        self.__memory_used -= sum(session['sizes'].values())
+        self.__evictions += 1
+        try:
+            if self.__spill_dir is None:
+                self.__spill_dir = tempfile.mkdtemp(prefix='raceEngineer-')
+            path = os.path.join(self.__spill_dir, f'session_{race_id}.pickle')
+            with open(path, 'wb') as file:
+                pickle.dump(session, file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.__spilled[race_id] = path
+            self.__spills += 1
+            logger.info(f"Session {race_id} evicted, spilled to {path}")
+        except Exception as e:
+            logger.info(f"Session {race_id} evicted, could not be spilled to disk: {e}")
+
+    def __reload(self, race_id):
+        path = self.__spilled.pop(race_id)
+        try:
+            with open(path, 'rb') as file:
+                session = pickle.load(file)
+            os.remove(path)
+        except Exception as e:
+            logger.info(f"Session {race_id} could not be loaded from {path}: {e}")
+            return
+        self.__sessions[race_id] = session
+        self.__memory_used += sum(session['sizes'].values())
+        self.__reloads += 1
+        self.__enforce_budget()
+
+    def stats(self):
+        """
+        Returns statistics about the sessions and the memory usage
+        :return: dict with statistics
+        """
+        with self.__lock:
+            return {'memory_budget': self.__memory_budget,
+                    'memory_used': self.__memory_used,
+                    'sessions_in_memory': len(self.__sessions),
+                    'sessions_live': sum(self.__session_is_live(session) for session in self.__sessions.values()),
+                    'sessions_spilled': len(self.__spilled),
+                    'hits': self.__hits,
+                    'misses': self.__misses,
+                    'evictions': self.__evictions,
+                    'spills': self.__spills,
+                    'reloads': self.__reloads,
+                    'drops': self.__drops,
+                    'sessions': [{'race_id': race_id,
+                                  'memory_used': sum(session['sizes'].values()),
+                                  'live': self.__session_is_live(session),
+                                  'data': len(session['data'])}
+                                 for race_id, session in reversed(self.__sessions.items())]}
+
+
+session_manager = SessionManager()
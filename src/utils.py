@@ -1,3 +1,5 @@
+import os
+import sys
 from datetime import datetime, timezone, timedelta
 
 
@@ -29,7 +31,58 @@ def current_year():
     return datetime.now().year
 
 
+def available_years():
+    return list(range(current_year(), 2022, -1))
+
+
 def get_hex_color(color):
     if not color:
         return '#111111'
     return f'#{color.lower()}'
+
+
+def process_memory():
+    # Current and peak resident memory (bytes) of this process, None when not available on the platform
+    current = peak = None
+    try:
+        import resource  # not available on Windows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == 'darwin' else 1024  # bytes on macOS, KB on Linux
+    except (ImportError, OSError):
+        pass
+    try:
+        with open('/proc/self/statm') as statm:  # Linux only
+            current = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if current is not None and peak is not None:
+        peak = max(current, peak)
+    return current, peak
+
+
+def deep_sizeof(element: any, sample: int = 200) -> int:
+    # Estimated memory footprint (bytes) of an object and of the objects it contains, shared objects counted once.
+    # Long lists (e.g. query results) are estimated from a sample of their items
+    if isinstance(element, list) and len(element) > sample:
+        step = len(element) / sample
+        items = [element[int(i * step)] for i in range(sample)]
+        return sys.getsizeof(element) + round((deep_sizeof(items) - sys.getsizeof(items)) * step)
+    seen = set()
+    size = 0
+    stack = [element]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(vars(item))
+        elif hasattr(item, '__slots__'):
+            stack.extend(getattr(item, slot) for slot in item.__slots__ if hasattr(item, slot))
+    return size
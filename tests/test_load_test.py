@@ -0,0 +1,89 @@
+import json
+import unittest
+from datetime import datetime, timezone, timedelta
+
+from dateutil import parser
+
+from load_test import OpenF1Stub, percentile
+
+reference = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+
+
+class TestPercentile(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        self.assertEqual(percentile(list(range(1, 11)), 50), 5)
+        self.assertEqual(percentile(list(range(1, 11)), 95), 10)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+        self.assertEqual(percentile(list(range(100, 0, -1)), 50), 50)  # values need not be sorted
+
+    def test_bounds(self):
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertEqual(percentile([1, 2, 3], 0), 1)
+        self.assertEqual(percentile([1, 2, 3], 100), 3)
+
+
+class TestOpenF1Stub(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = OpenF1Stub([2024, 2023], races_per_year=3, laps=5, drivers=4, seed=1, reference=reference,
+                               live_sessions=1)
+
+    def get(self, endpoint, **params):
+        return json.loads(self.stub.get(endpoint, {key: str(value) for key, value in params.items()}))
+
+    def test_sessions(self):
+        sessions = self.get('sessions', year=2024, session_type='Race')
+        self.assertEqual(len(sessions), 3)
+        self.assertTrue(all(session['year'] == 2024 for session in sessions))
+        session_key = sessions[0]['session_key']
+        self.assertEqual(self.get('sessions', session_key=session_key), [sessions[0]])
+        self.assertEqual(self.get('sessions', year=2022), [])
+        self.assertEqual(self.get('drivers', session_key='unknown'), [])
+
+    def test_live_sessions(self):
+        sessions = self.stub.sessions()
+        self.assertEqual([session['year'] for session in sessions], [2023] * 3 + [2024] * 3)
+        # Only the latest session is live at the reference date, the others are over
+        live = [parser.isoparse(session['date_start']) <= reference < parser.isoparse(session['date_end'])
+                for session in sessions]
+        self.assertEqual(live, [False] * 5 + [True])
+        self.assertTrue(all(parser.isoparse(session['date_end']) < reference - timedelta(days=1)
+                            for session in sessions[:-1]))
+        self.assertEqual(self.get('sessions', session_key='latest'), [sessions[-1]])
+        # Session keys do not depend on the years
+        stub = OpenF1Stub([2026, 2025], races_per_year=3, laps=5, drivers=4, seed=1, reference=reference)
+        self.assertEqual([session['session_key'] for session in stub.sessions()],
+                         [session['session_key'] for session in sessions])
+
+    def test_session_data(self):
+        session_key = self.get('sessions', year=2024)[0]['session_key']
+        self.assertEqual(len(self.get('drivers', session_key=session_key)), 4)
+        laps = self.get('laps', session_key=session_key)
+        self.assertEqual(len(laps), 5 * 4)
+        self.assertTrue(all(lap['lap_duration'] is None for lap in laps if lap['lap_number'] == 1))
+        positions = self.get('position', session_key=session_key)
+        self.assertEqual(len(positions), 5 * 4)
+        self.assertEqual(sorted({position['position'] for position in positions}), [1, 2, 3, 4])
+        self.assertTrue(self.get('intervals', session_key=session_key))
+
+    def test_date_filter(self):
+        session_key = self.get('sessions', year=2024)[0]['session_key']
+        positions = self.get('position', session_key=session_key)
+        last_date = positions[-1]['date']
+        filtered = json.loads(self.stub.get('position', {'session_key': str(session_key), 'date>': last_date}))
+        self.assertEqual(filtered, [position for position in positions if position['date'] == last_date])
+
+    def test_deterministic(self):
+        stub = OpenF1Stub([2024, 2023], races_per_year=3, laps=5, drivers=4, seed=1, reference=reference,
+                          live_sessions=1)
+        session_key = self.get('sessions', year=2023)[1]['session_key']
+        for endpoint in ('drivers', 'laps', 'position', 'intervals'):
+            self.assertEqual(stub.get(endpoint, {'session_key': str(session_key)}),
+                             self.stub.get(endpoint, {'session_key': str(session_key)}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import pickle
+import unittest
+from datetime import datetime, timezone, timedelta
+
+from src.position_timeline import PositionTimeline
+
+start = datetime(2024, 5, 1, 13, tzinfo=timezone.utc)
+
+
+def row(driver, seconds, position):
+    return {'driver_number': driver, 'date': (start + timedelta(seconds=seconds)).isoformat(), 'position': position}
+
+
+def at(seconds):
+    return start + timedelta(seconds=seconds)
+
+
+class TestPositionTimeline(unittest.TestCase):
+
+    def setUp(self):
+        # Driver 1 overtakes driver 2 at 10s, driver 3 overtakes driver 1 at 20s, driver 2 overtakes driver 1 at 30s
+        self.rows = [row(1, 0, 2), row(2, 0, 1), row(3, 0, 3),
+                     row(1, 10, 1), row(2, 10, 2), row(3, 10, 3),
+                     row(1, 20, 2), row(2, 20, 3), row(3, 20, 1),
+                     row(1, 30, 3), row(2, 30, 2), row(3, 30, 1)]
+
+    def test_add_in_order(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows)
+        self.assertEqual(timeline.classification(), {3: 1, 2: 2, 1: 3})
+        # Run-length: only changes are kept (driver 3 changes once)
+        self.assertEqual(timeline.driver_changes(3)[1], [3, 1])
+        self.assertEqual(timeline.end(), at(30))
+
+    def test_add_incremental_and_repeated_rows(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows[:6])
+        timeline.add(self.rows[3:])  # rows at the latest date are queried again
+        self.assertEqual(timeline.driver_changes(1)[1], [2, 1, 2, 3])
+        self.assertEqual(len(timeline.changes_between(at(0), at(30))), 10)
+
+    def test_add_out_of_order(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows[:6] + [row(1, 20, 2), row(2, 20, 3)])
+        # Driver 3 change at 20s arrives after changes of other drivers at 20s and 25s
+        timeline.add([row(2, 25, 2), row(1, 25, 3)])
+        timeline.add([row(3, 20, 1)])
+        self.assertEqual(timeline.classification(at(20)), {3: 1, 1: 2, 2: 3})
+        self.assertEqual([change[1] for change in timeline.changes_between(at(20), at(20))], [1, 2, 3])
+        # Data older than the latest change of a driver is ignored
+        timeline.add([row(1, 5, 3)])
+        self.assertEqual(timeline.position_at(1, at(5)), 2)
+
+    def test_add_mixed_date_formats(self):
+        timeline = PositionTimeline()
+        timeline.add([{'driver_number': 1, 'date': '2024-05-01T13:00:01.5+00:00', 'position': 2},
+                      {'driver_number': 1, 'date': '2024-05-01T13:00:01Z', 'position': 1}])
+        self.assertEqual(timeline.driver_changes(1)[1], [1, 2])
+        self.assertEqual(timeline.last_date, '2024-05-01T13:00:01.5+00:00')
+
+    def test_classification_at(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows)
+        self.assertEqual(timeline.classification(at(-1)), {})
+        self.assertEqual(timeline.classification(at(0)), {2: 1, 1: 2, 3: 3})
+        self.assertEqual(timeline.classification(at(15)), {1: 1, 2: 2, 3: 3})
+        self.assertEqual(timeline.classification((start + timedelta(seconds=25)).isoformat()), {3: 1, 1: 2, 2: 3})
+        self.assertEqual(timeline.classification(at(100)), timeline.classification())
+
+    def test_changes_between_boundaries(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows)
+        # Both dates are included
+        changes = timeline.changes_between(at(10), at(20))
+        self.assertEqual([(change[0], change[1]) for change in changes],
+                         [(at(10).timestamp(), 1), (at(10).timestamp(), 2),
+                          (at(20).timestamp(), 1), (at(20).timestamp(), 2), (at(20).timestamp(), 3)])
+        self.assertEqual(changes[0][2:], (2, 1))  # previous position, new position
+        self.assertEqual(timeline.changes_between(at(11), at(19)), [])
+        self.assertEqual(len(timeline.changes_between(at(0), at(0))), 3)
+
+    def test_overtakes_per_lap(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows)
+        laps = {1: at(0), 2: at(10), 3: at(25)}
+        # Lap 1: grid only; lap 2: driver 1 (10s) and driver 3 (20s); lap 3: driver 2 (30s)
+        self.assertEqual(timeline.overtakes_per_lap(laps), {1: 0, 2: 2, 3: 1})
+        # Prefix sums are extended incrementally and rebuilt after an out of order insert
+        timeline.add([row(1, 40, 2), row(2, 40, 3)])
+        self.assertEqual(timeline.overtakes_per_lap(laps), {1: 0, 2: 2, 3: 2})
+        timeline.add([row(3, 35, 2)])  # older than the latest change of other drivers: inserted
+        self.assertEqual(timeline.overtakes_per_lap(laps), {1: 0, 2: 2, 3: 2})
+        timeline.add([row(3, 45, 1)])
+        self.assertEqual(timeline.overtakes_per_lap(laps), {1: 0, 2: 2, 3: 3})
+
+    def test_pickle(self):
+        timeline = PositionTimeline()
+        timeline.add(self.rows)
+        timeline.overtakes_per_lap({1: at(0)})
+        reloaded = pickle.loads(pickle.dumps(timeline))
+        self.assertEqual(reloaded.classification(at(25)), timeline.classification(at(25)))
+        reloaded.add([row(1, 40, 1), row(3, 40, 3)])
+        self.assertEqual(reloaded.overtakes_per_lap({1: at(0)}), {1: 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
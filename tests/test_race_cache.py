@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from src import race_cache
+from src.race_cache import RaceCache
+
+
+class TestRaceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(race_cache.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(race_cache, 'RaceData')
+        self.race_data = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = RaceCache(retry_interval=60)
+
+    def test_races_of_year_kept(self):
+        self.race_data.return_value.get_races_of_year.return_value = {1: {'session_key': 1}}
+        self.assertEqual(self.cache.get_races_of_year(2024), {1: {'session_key': 1}})
+        self.assertEqual(self.cache.get_races_of_year('2024'), {1: {'session_key': 1}})
+        self.assertEqual(self.race_data.return_value.get_races_of_year.call_count, 1)
+
+    def test_missing_races_of_year_retried_after_interval(self):
+        get_races_of_year = self.race_data.return_value.get_races_of_year
+        get_races_of_year.return_value = {}
+        self.assertEqual(self.cache.get_races_of_year(2024), {})
+        self.now += 59
+        self.assertEqual(self.cache.get_races_of_year(2024), {})
+        self.assertEqual(get_races_of_year.call_count, 1)
+        self.now += 1
+        get_races_of_year.return_value = {1: {'session_key': 1}}
+        self.assertEqual(self.cache.get_races_of_year(2024), {1: {'session_key': 1}})
+        self.assertEqual(get_races_of_year.call_count, 2)
+
+    def test_missing_drivers_retried_after_interval(self):
+        get_drivers = self.race_data.return_value.get_drivers
+        get_drivers.return_value = {}
+        self.assertEqual(self.cache.get_drivers(1), {})
+        self.assertEqual(self.cache.get_drivers('1'), {})
+        self.assertEqual(get_drivers.call_count, 1)
+        self.now += 60
+        get_drivers.return_value = {44: {'driver_number': 44}}
+        self.assertEqual(self.cache.get_drivers(1), {44: {'driver_number': 44}})
+        self.now += 600
+        self.assertEqual(self.cache.get_drivers(1), {44: {'driver_number': 44}})
+        self.assertEqual(get_drivers.call_count, 2)
+
+    def test_latest_drivers_not_cached(self):
+        get_drivers = self.race_data.return_value.get_drivers
+        get_drivers.return_value = {}
+        self.cache.get_drivers('latest')
+        self.cache.get_drivers('latest')
+        self.assertEqual(get_drivers.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
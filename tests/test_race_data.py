@@ -0,0 +1,28 @@
+import unittest
+from unittest import mock
+
+from src import race_data
+from src.race_data import RaceData
+
+
+class TestLapStarts(unittest.TestCase):
+
+    def test_earliest_start_with_mixed_date_formats(self):
+        laps = [{'driver_number': 1, 'lap_number': 2, 'date_start': '2024-05-01T13:01:30.5+00:00'},
+                {'driver_number': 2, 'lap_number': 2, 'date_start': '2024-05-01T13:01:30Z'},
+                {'driver_number': 1, 'lap_number': 1, 'date_start': '2024-05-01T13:00:00+00:00'},
+                {'driver_number': 2, 'lap_number': 1, 'date_start': None},
+                # Same instant in another time zone: later as a string, earlier once parsed
+                {'driver_number': 1, 'lap_number': 3, 'date_start': '2024-05-01T13:03:00+00:00'},
+                {'driver_number': 2, 'lap_number': 3, 'date_start': '2024-05-01T15:02:59+02:00'}]
+        response = mock.Mock(status_code=200, json=lambda: list(laps))
+        with mock.patch.object(race_data.requests, 'get', return_value=response):
+            lap_starts = RaceData('latest').get_lap_starts()  # the latest session is not kept by the session manager
+        self.assertEqual(lap_starts, {1: '2024-05-01T13:00:00+00:00',
+                                      2: '2024-05-01T13:01:30Z',
+                                      3: '2024-05-01T15:02:59+02:00'})
+        self.assertEqual(list(lap_starts), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
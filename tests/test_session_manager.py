@@ -0,0 +1,143 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone, timedelta
+from unittest import mock
+
+from src import race_data
+from src.race_data import RaceData
+from src.session_manager import SessionManager
+
+start = datetime(2024, 5, 1, 15, tzinfo=timezone.utc)
+
+
+class Clock:
+    """
+    Clock of the tests, only moved forward by the tests
+    """
+
+    def __init__(self):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+class TestSessionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_session_over_is_served(self):
+        manager = SessionManager(memory_budget=2 ** 20)
+        manager.put(1, 'laps', [1, 2, 3])
+        self.assertEqual(manager.get(1, 'laps'), [1, 2, 3])
+        self.assertIsNone(manager.get(1, 'position'))
+
+    def test_live_data_dropped_when_session_is_over(self):
+        manager = SessionManager(memory_budget=2 ** 20, clock=self.clock)
+        manager.put(1, 'laps', [1, 2, 3], live_until=start + timedelta(hours=1))
+        manager.put(2, 'laps', [1, 2, 3], live_until=start + timedelta(hours=2))
+        self.clock.advance(minutes=59)
+        self.assertEqual(manager.get(1, 'laps'), [1, 2, 3])
+        self.clock.advance(minutes=1)
+        self.assertIsNone(manager.get(1, 'laps'))
+        self.assertEqual(manager.get(2, 'laps'), [1, 2, 3])
+        self.assertEqual(manager.stats()['drops'], 1)
+        self.assertEqual(manager.stats()['sessions_in_memory'], 1)
+
+    def test_eviction_keeps_live_sessions(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            manager = SessionManager(memory_budget=1, spill_dir=spill_dir, clock=self.clock)
+            manager.put(1, 'laps', list(range(100)), live_until=start + timedelta(hours=1))
+            manager.put(2, 'laps', list(range(100)))
+            manager.put(3, 'laps', list(range(100)))
+            stats = manager.stats()
+            self.assertEqual([session['race_id'] for session in stats['sessions']], ['3', '1'])
+            self.assertEqual(stats['sessions_spilled'], 1)
+            # Spilled session is loaded back when viewed again
+            self.assertEqual(manager.get(2, 'laps'), list(range(100)))
+            self.assertEqual(manager.stats()['reloads'], 1)
+
+    def test_spilled_live_data_dropped_when_session_is_over(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            manager = SessionManager(memory_budget=1, spill_dir=spill_dir, clock=self.clock)
+            manager.put(1, 'laps', list(range(100)), live_until=start + timedelta(hours=1))
+            self.clock.advance(hours=1)
+            manager.put(2, 'laps', list(range(100)))  # session 1 is over: evicted and spilled
+            self.assertEqual(manager.stats()['sessions_spilled'], 1)
+            self.assertIsNone(manager.get(1, 'laps'))
+
+
+class TestRaceDataLiveSession(unittest.TestCase):
+
+    def setUp(self):
+        # The session ends at the start of the tests, and is live until the end of the margin
+        self.clock = Clock()
+        clock = self.clock
+
+        class Datetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now.astimezone(tz)
+
+        # RaceData uses a session manager of its own, with the same clock
+        for patcher in (mock.patch.object(race_data, 'datetime', Datetime),
+                        mock.patch.object(race_data, 'session_manager',
+                                          SessionManager(memory_budget=2 ** 20, clock=self.clock))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_live_session_queried_again_when_over(self):
+        race_id = 'test-live-session'
+        laps = [{'driver_number': 1, 'lap_number': n, 'lap_duration': 90.0, 'date_start': None} for n in range(3, 11)]
+        data = {'sessions': [{'session_key': race_id, 'date_end': start.isoformat()}],
+                'laps': laps}
+        requests_made = []
+
+        def get(url):
+            endpoint = url.split('/')[-1].split('?')[0]
+            requests_made.append(endpoint)
+            return mock.Mock(status_code=200, json=lambda: list(data[endpoint]))
+
+        with mock.patch.object(race_data.requests, 'get', side_effect=get):
+            self.assertEqual(len(RaceData(race_id).get_driver_laps()[1]), 9)  # lap 0 + 8 laps queried while live
+            data['laps'] = laps + [{'driver_number': 1, 'lap_number': 11, 'lap_duration': 90.0, 'date_start': None}]
+            self.clock.advance(minutes=59)
+            self.assertEqual(len(RaceData(race_id).get_driver_laps()[1]), 10)  # still live: queried again
+            self.assertEqual(requests_made.count('laps'), 2)
+            self.clock.advance(minutes=1)  # session over
+            self.assertEqual(len(RaceData(race_id).get_driver_laps()[1]), 10)
+            self.assertEqual(requests_made.count('laps'), 3)
+            self.assertEqual(len(RaceData(race_id).get_driver_laps()[1]), 10)
+            self.assertEqual(requests_made.count('laps'), 3)  # final data is served from memory
+
+    def test_live_positions_queried_again_when_over(self):
+        race_id = 'test-live-positions'
+        positions = [{'driver_number': 1, 'date': '2024-05-01T13:00:00+00:00', 'position': 2},
+                     {'driver_number': 2, 'date': '2024-05-01T13:00:00+00:00', 'position': 1}]
+        data = {'sessions': [{'session_key': race_id, 'date_end': start.isoformat()}],
+                'position': positions}
+        requests_made = []
+
+        def get(url):
+            endpoint = url.split('/')[-1].split('?')[0]
+            requests_made.append(url.split('/')[-1])
+            return mock.Mock(status_code=200, json=lambda: list(data[endpoint]))
+
+        with mock.patch.object(race_data.requests, 'get', side_effect=get):
+            self.assertEqual(RaceData(race_id).get_driver_positions().classification(), {2: 1, 1: 2})
+            data['position'] = positions + [{'driver_number': 1, 'date': '2024-05-01T14:00:00+00:00', 'position': 1},
+                                            {'driver_number': 2, 'date': '2024-05-01T14:00:00+00:00', 'position': 2}]
+            self.clock.advance(hours=1)  # session over
+            self.assertEqual(RaceData(race_id).get_driver_positions().classification(), {1: 1, 2: 2})
+            self.assertEqual(RaceData(race_id).get_driver_positions().classification(), {1: 1, 2: 2})
+            # Full query while live, full query once over, then served from memory
+            self.assertEqual([request for request in requests_made if request.startswith('position')],
+                             [f'position?session_key={race_id}'] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()